@@ -1,20 +1,36 @@
 import os
-import time
-import base64
-from fastapi import FastAPI, HTTPException
+import asyncio
+import logging
+from contextlib import asynccontextmanager, suppress
+from fastapi import FastAPI, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from fastapi.openapi.utils import get_openapi
-from dotenv import load_dotenv
-import httpx
+import orjson
+from tekmetric.client import close_client, etag_response, get_access_token, make_etag, open_client, token_refresher
 
-# Load environment variables
-load_dotenv()
+logger = logging.getLogger(__name__)
 
-# Tekmetric configuration
-TEKMETRIC_BASE_URL = "https://shop.tekmetric.com/api/v1"
-CLIENT_ID = os.getenv("CLIENT_ID")
-CLIENT_SECRET = os.getenv("CLIENT_SECRET")
-SHOP_ID = os.getenv("TEKMETRIC_SHOP_ID")
+class ORJSONResponse(JSONResponse):
+    # fastapi.responses.ORJSONResponse is deprecated; same idea, no warning
+    def render(self, content) -> bytes:
+        return orjson.dumps(content)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await open_client()
+    # Warm the token cache so the first request skips the OAuth round trip
+    try:
+        await get_access_token()
+    except Exception as e:
+        logger.warning("Token prefetch at startup failed: %s", e)
+    refresher = asyncio.create_task(token_refresher())
+    yield
+    # Stop the refresher before the client it posts through is closed
+    refresher.cancel()
+    with suppress(asyncio.CancelledError):
+        await refresher
+    await close_client()
 
 # FastAPI app: Swagger uses full schema at /openapi-full.json
 app = FastAPI(
@@ -23,7 +39,9 @@ app = FastAPI(
     openapi_url="/openapi-full.json",
     docs_url="/docs",
     redoc_url=None,
-    servers=[{"url": "https://web-production-1dc1.up.railway.app"}]
+    servers=[{"url": "https://web-production-1dc1.up.railway.app"}],
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan,
 )
 
 # Enable CORS for GPT
@@ -35,30 +53,6 @@ app.add_middleware(
     allow_credentials=True,
 )
 
-# Token cache
-_token_cache = {"access_token": None, "expires_at": 0}
-
-async def get_access_token() -> str:
-    global _token_cache
-    if _token_cache["access_token"] and time.time() < _token_cache["expires_at"]:
-        return _token_cache["access_token"]
-    if not CLIENT_ID or not CLIENT_SECRET:
-        raise HTTPException(status_code=500, detail="Missing CLIENT_ID or CLIENT_SECRET")
-    auth_header = base64.b64encode(f"{CLIENT_ID}:{CLIENT_SECRET}".encode()).decode()
-    headers = {"Authorization": f"Basic {auth_header}"}
-    form = {"grant_type": "client_credentials"}
-    async with httpx.AsyncClient() as client:
-        res = await client.post(f"{TEKMETRIC_BASE_URL}/oauth/token", headers=headers, data=form)
-        res.raise_for_status()
-        token_data = res.json()
-    access_token = token_data.get("access_token")
-    expires_in = token_data.get("expires_in", 0)
-    if not access_token:
-        raise HTTPException(status_code=500, detail="No access_token returned")
-    _token_cache["access_token"] = access_token
-    _token_cache["expires_at"] = time.time() + expires_in - 10
-    return access_token
-
 @app.get("/api/debug/token", summary="Debug Token Retrieval")
 async def debug_token():
     try:
@@ -69,9 +63,13 @@ async def debug_token():
     except Exception as e:
         return {"error": str(e)}
 
+# Static body and ETag, computed once
+_HEALTH_BYTES = orjson.dumps({"status": "ok"})
+_HEALTH_ETAG = make_etag(_HEALTH_BYTES)
+
 @app.get("/api/health", summary="Health Check")
-async def health_check():
-    return {"status": "ok"}
+async def health_check(request: Request):
+    return etag_response(request, _HEALTH_BYTES, _HEALTH_ETAG)
 
 # Include routers
 from routers.shops import router as shops_router
@@ -122,5 +120,15 @@ async def openapi_for_gpt():
     # Also explicitly remove health and debug endpoints
     schema["paths"].pop("/api/health", None)
     schema["paths"].pop("/api/debug/token", None)
+    schema["paths"].pop("/api/repair_orders/open.msgpack", None)
 
     return schema
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # Only configure root logging for local runs; under uvicorn/Procfile the
+    # server owns logging setup
+    logging.basicConfig(level=os.getenv("LOG_LEVEL", "INFO"))
+    uvicorn.run(app, host="0.0.0.0", port=int(os.getenv("PORT", 8000)))
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
 from pydantic import BaseModel
-import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL, SHOP_ID
+import orjson
+from tekmetric import client
+from tekmetric.client import get_auth_headers, json_response, passthrough, SHOP_ID
 
 router = APIRouter()
 
@@ -40,8 +41,7 @@ async def list_appointments(
     size: int = Query(100, description="Number of results per page"),
     page: int = Query(0, description="Page number"),
 ):
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = await get_auth_headers()
     params = {
         "shop": SHOP_ID,
         "customerId": customerId,
@@ -58,53 +58,44 @@ async def list_appointments(
     }
     params = {k: v for k, v in params.items() if v is not None}
 
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/appointments", headers=headers, params=params)
-        res.raise_for_status()
-        return {"appointments": res.json().get("content", [])}
+    res = await client.http_client.get("/appointments", headers=headers, params=params)
+    res.raise_for_status()
+    return json_response({"appointments": orjson.loads(res.content).get("content", [])})
 
 @router.get("/{appointment_id}", summary="Get Appointment by ID")
 async def get_appointment(appointment_id: int):
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/appointments/{appointment_id}", headers=headers)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Appointment ID {appointment_id} not found")
-        res.raise_for_status()
-        return res.json()
+    headers = await get_auth_headers()
+    res = await client.http_client.get(f"/appointments/{appointment_id}", headers=headers)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Appointment ID {appointment_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
 
 @router.post("/", summary="Create Appointment")
 async def create_appointment(appointment: AppointmentCreate):
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    payload = appointment.dict()
+    headers = await get_auth_headers()
+    payload = appointment.model_dump(exclude_none=True)
     payload["shopId"] = SHOP_ID
-    async with httpx.AsyncClient() as client:
-        res = await client.post(f"{TEKMETRIC_BASE_URL}/appointments", headers=headers, json=payload)
-        res.raise_for_status()
-        return res.json()
+    res = await client.http_client.post("/appointments", headers=headers, json=payload)
+    res.raise_for_status()
+    return passthrough(res)
 
 @router.patch("/{appointment_id}", summary="Update Appointment")
 async def update_appointment(appointment_id: int, appointment: AppointmentUpdate):
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    payload = appointment.dict(exclude_unset=True)
+    headers = await get_auth_headers()
+    payload = appointment.model_dump(exclude_unset=True)
     payload["shopId"] = SHOP_ID
-    async with httpx.AsyncClient() as client:
-        res = await client.patch(f"{TEKMETRIC_BASE_URL}/appointments/{appointment_id}", headers=headers, json=payload)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Appointment ID {appointment_id} not found")
-        res.raise_for_status()
-        return res.json()
+    res = await client.http_client.patch(f"/appointments/{appointment_id}", headers=headers, json=payload)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Appointment ID {appointment_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
 
 @router.delete("/{appointment_id}", summary="Delete Appointment")
 async def delete_appointment(appointment_id: int):
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        res = await client.delete(f"{TEKMETRIC_BASE_URL}/appointments/{appointment_id}", headers=headers)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Appointment ID {appointment_id} not found")
-        res.raise_for_status()
-        return res.json()
\ No newline at end of file
+    headers = await get_auth_headers()
+    res = await client.http_client.delete(f"/appointments/{appointment_id}", headers=headers)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Appointment ID {appointment_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
\ No newline at end of file
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
 from typing import List
-import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL, SHOP_ID
+import orjson
+from tekmetric import client
+from tekmetric.client import get_auth_headers, json_response, passthrough, SHOP_ID
 
 router = APIRouter()
 
@@ -26,8 +27,7 @@ async def list_canned_jobs(
     Returns a list of all canned jobs filtered by the provided search parameters.
     Tekmetric endpoint: GET /api/v1/canned-jobs
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = await get_auth_headers()
     params = {
         "shop": SHOP_ID,
         "search": search,
@@ -40,10 +40,9 @@ async def list_canned_jobs(
     }
     params = {k: v for k, v in params.items() if v is not None}
 
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/canned-jobs", headers=headers, params=params)
-        res.raise_for_status()
-        return {"cannedJobs": res.json().get("content", [])}
+    res = await client.http_client.get("/canned-jobs", headers=headers, params=params)
+    res.raise_for_status()
+    return json_response({"cannedJobs": orjson.loads(res.content).get("content", [])})
 
 @router.post("/repair_orders/{ro_id}", summary="Add Canned Jobs to Repair Order")
 async def add_canned_jobs_to_repair_order(
@@ -54,21 +53,13 @@ async def add_canned_jobs_to_repair_order(
     Adds given canned jobs to a repair order.
     Tekmetric endpoint: POST /api/v1/repair-orders/{id}/canned-jobs
     """
-    token = await get_access_token()
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    # Validate the repair order exists
-    async with httpx.AsyncClient() as client:
-        ro_res = await client.get(f"{TEKMETRIC_BASE_URL}/repair-orders/{ro_id}", headers=headers)
-        if ro_res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Repair Order ID {ro_id} not found")
-        # Add the canned jobs
-        res = await client.post(
-            f"{TEKMETRIC_BASE_URL}/repair-orders/{ro_id}/canned-jobs",
-            headers=headers,
-            json=body.jobIds
-        )
-        res.raise_for_status()
-        return res.json()
+    headers = await get_auth_headers()
+    res = await client.http_client.post(
+        f"/repair-orders/{ro_id}/canned-jobs",
+        headers=headers,
+        json=body.jobIds
+    )
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Repair Order ID {ro_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from pydantic import BaseModel, Field
-import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL, SHOP_ID
+import orjson
+from tekmetric import client
+from tekmetric.client import get_auth_headers, json_response, passthrough, invalidate_cached, SHOP_ID
 
 router = APIRouter()
 
@@ -40,14 +41,12 @@ async def search_customers(search: str = Query(..., description="Search term (su
     Returns up to 10 matching Customers by substring search.
     Tekmetric endpoint: GET /api/v1/customers
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = await get_auth_headers()
     params = {"shop": SHOP_ID, "search": search, "size": 10}
 
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/customers", headers=headers, params=params)
-        res.raise_for_status()
-        return {"customers": res.json().get("content", [])}
+    res = await client.http_client.get("/customers", headers=headers, params=params)
+    res.raise_for_status()
+    return json_response({"customers": orjson.loads(res.content).get("content", [])})
 
 @router.get("/{customer_id}", summary="Get Customer by ID")
 async def get_customer_by_id(customer_id: int):
@@ -55,15 +54,13 @@ async def get_customer_by_id(customer_id: int):
     Get a single Customer by ID.
     Tekmetric endpoint: GET /api/v1/customers/{id}
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = await get_auth_headers()
 
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/customers/{customer_id}", headers=headers)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Customer ID {customer_id} not found")
-        res.raise_for_status()
-        return res.json()
+    res = await client.http_client.get(f"/customers/{customer_id}", headers=headers)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Customer ID {customer_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
 
 @router.post("/", summary="Create Customer")
 async def create_customer(customer: CustomerCreate):
@@ -71,15 +68,13 @@ async def create_customer(customer: CustomerCreate):
     Create a new Customer in Tekmetric.
     Tekmetric endpoint: POST /api/v1/customers
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    payload = customer.dict()
+    headers = await get_auth_headers()
+    payload = customer.model_dump(exclude_none=True)
     payload["shopId"] = SHOP_ID
 
-    async with httpx.AsyncClient() as client:
-        res = await client.post(f"{TEKMETRIC_BASE_URL}/customers", headers=headers, json=payload)
-        res.raise_for_status()
-        return res.json()
+    res = await client.http_client.post("/customers", headers=headers, json=payload)
+    res.raise_for_status()
+    return passthrough(res)
 
 @router.patch("/{customer_id}", summary="Update Customer")
 async def update_customer(customer_id: int, customer: CustomerUpdate):
@@ -87,20 +82,16 @@ async def update_customer(customer_id: int, customer: CustomerUpdate):
     Update fields on an existing Customer.
     Tekmetric endpoint: PATCH /api/v1/customers/{id}
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    payload = customer.dict(exclude_unset=True)
-
-    async with httpx.AsyncClient() as client:
-        # Check if customer exists
-        check = await client.get(f"{TEKMETRIC_BASE_URL}/customers/{customer_id}", headers=headers)
-        if check.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Customer ID {customer_id} not found")
+    headers = await get_auth_headers()
+    payload = customer.model_dump(exclude_unset=True)
+    payload["shopId"] = SHOP_ID
 
-        payload["shopId"] = SHOP_ID
-        res = await client.patch(f"{TEKMETRIC_BASE_URL}/customers/{customer_id}", headers=headers, json=payload)
-        res.raise_for_status()
-        return res.json()
+    res = await client.http_client.patch(f"/customers/{customer_id}", headers=headers, json=payload)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Customer ID {customer_id} not found")
+    res.raise_for_status()
+    invalidate_cached("customers", customer_id)
+    return passthrough(res)
 
 @router.delete("/{customer_id}", summary="Delete Customer")
 async def delete_customer(customer_id: int):
@@ -108,12 +99,11 @@ async def delete_customer(customer_id: int):
     Deletes (archives) a Customer.
     Tekmetric endpoint: DELETE /api/v1/customers/{id}
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = await get_auth_headers()
 
-    async with httpx.AsyncClient() as client:
-        res = await client.delete(f"{TEKMETRIC_BASE_URL}/customers/{customer_id}", headers=headers)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Customer ID {customer_id} not found")
-        res.raise_for_status()
-        return {"detail": f"Customer {customer_id} deleted"}
\ No newline at end of file
+    res = await client.http_client.delete(f"/customers/{customer_id}", headers=headers)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Customer ID {customer_id} not found")
+    res.raise_for_status()
+    invalidate_cached("customers", customer_id)
+    return {"detail": f"Customer {customer_id} deleted"}
\ No newline at end of file
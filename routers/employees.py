@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
-import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL, SHOP_ID
+import orjson
+from tekmetric import client
+from tekmetric.client import get_auth_headers, json_response, passthrough, SHOP_ID
 
 router = APIRouter()
 
@@ -15,8 +16,7 @@ async def list_employees(
     size: int = Query(100, description="Number of results per page"),
     page: int = Query(0, description="Page number"),
 ):
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = await get_auth_headers()
     params = {
         "shop": SHOP_ID,
         "search": search,
@@ -30,18 +30,15 @@ async def list_employees(
     # Remove None values from params
     params = {k: v for k, v in params.items() if v is not None}
 
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/employees", headers=headers, params=params)
-        res.raise_for_status()
-        return {"employees": res.json().get("content", [])}
+    res = await client.http_client.get("/employees", headers=headers, params=params)
+    res.raise_for_status()
+    return json_response({"employees": orjson.loads(res.content).get("content", [])})
 
 @router.get("/{employee_id}", summary="Get Employee by ID")
 async def get_employee(employee_id: int):
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/employees/{employee_id}", headers=headers)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Employee ID {employee_id} not found")
-        res.raise_for_status()
-        return res.json()
\ No newline at end of file
+    headers = await get_auth_headers()
+    res = await client.http_client.get(f"/employees/{employee_id}", headers=headers)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Employee ID {employee_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
\ No newline at end of file
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
-import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL, SHOP_ID
+import orjson
+from tekmetric import client
+from tekmetric.client import get_auth_headers, json_response, passthrough, SHOP_ID
 
 router = APIRouter()
 
@@ -20,8 +21,7 @@ async def list_inspections(
     Retrieve a list of Digital Vehicle Inspections (DVIs) for this shop.
     Tekmetric endpoint: GET /api/v1/inspections
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = await get_auth_headers()
     params = {
         "shop": SHOP_ID,
         "startDate": startDate,
@@ -36,14 +36,13 @@ async def list_inspections(
     # Remove None values
     params = {k: v for k, v in params.items() if v is not None}
 
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/inspections", headers=headers, params=params)
-        res.raise_for_status()
-        data = res.json()
-        return {
-            "inspections": data.get("content", []),
-            "pageable": data.get("pageable", {})
-        }
+    res = await client.http_client.get("/inspections", headers=headers, params=params)
+    res.raise_for_status()
+    data = orjson.loads(res.content)
+    return json_response({
+        "inspections": data.get("content", []),
+        "pageable": data.get("pageable", {})
+    })
 
 @router.get("/{inspection_id}", summary="Get Inspection by ID")
 async def get_inspection(
@@ -54,13 +53,11 @@ async def get_inspection(
     Retrieve detailed information for a specific inspection.
     Tekmetric endpoint: GET /api/v1/inspections/{id}
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = await get_auth_headers()
     params = {"shop": SHOP_ID}
 
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/inspections/{inspection_id}", headers=headers, params=params)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Inspection ID {inspection_id} not found")
-        res.raise_for_status()
-        return res.json()
\ No newline at end of file
+    res = await client.http_client.get(f"/inspections/{inspection_id}", headers=headers, params=params)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Inspection ID {inspection_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
\ No newline at end of file
@@ -1,7 +1,8 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
-import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL, SHOP_ID
+import orjson
+from tekmetric import client
+from tekmetric.client import get_auth_headers, json_response, SHOP_ID
 
 router = APIRouter()
 
@@ -22,8 +23,7 @@ async def list_inventory(
     Returns a list of inventory parts filtered by provided parameters.
     Tekmetric endpoint: GET /api/v1/inventory
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = await get_auth_headers()
     params = {
         "shop": SHOP_ID,
         "partTypeId": partTypeId,
@@ -40,8 +40,7 @@ async def list_inventory(
     # Remove None values
     params = {k: v for k, v in params.items() if v is not None}
 
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/inventory", headers=headers, params=params)
-        res.raise_for_status()
-        data = res.json()
-        return {"inventory": data.get("content", []), "pageable": data.get("pageable", {})}
\ No newline at end of file
+    res = await client.http_client.get("/inventory", headers=headers, params=params)
+    res.raise_for_status()
+    data = orjson.loads(res.content)
+    return json_response({"inventory": data.get("content", []), "pageable": data.get("pageable", {})})
\ No newline at end of file
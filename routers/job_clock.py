@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException, Body
 from typing import Optional
-import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL
+from tekmetric import client
+from tekmetric.client import get_auth_headers, passthrough
 
 router = APIRouter()
 
@@ -11,19 +11,14 @@ async def update_job_clock(
     technicianId: int = Body(..., description="Employee ID of the technician"),
     loggedHours: float = Body(..., description="Hours logged on job by employee")
 ):
-    token = await get_access_token()
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
+    headers = await get_auth_headers()
     payload = {"technicianId": technicianId, "loggedHours": loggedHours}
-    async with httpx.AsyncClient() as client:
-        res = await client.put(
-            f"{TEKMETRIC_BASE_URL}/jobs/{job_id}/job-clock",
-            headers=headers,
-            json=payload
-        )
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Job ID {job_id} not found")
-        res.raise_for_status()
-        return res.json()
\ No newline at end of file
+    res = await client.http_client.put(
+        f"/jobs/{job_id}/job-clock",
+        headers=headers,
+        json=payload
+    )
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Job ID {job_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
\ No newline at end of file
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel, Field
-import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL
+from tekmetric import client
+from tekmetric.client import get_auth_headers, passthrough
 
 router = APIRouter()
 
@@ -20,19 +20,14 @@ async def update_labor(
     Updates the technician for a specific labor entry.
     Tekmetric endpoint: PATCH /api/v1/labor/{id}
     """
-    token = await get_access_token()
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    payload = body.dict()
-    async with httpx.AsyncClient() as client:
-        res = await client.patch(
-            f"{TEKMETRIC_BASE_URL}/labor/{labor_id}",
-            headers=headers,
-            json=payload
-        )
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Labor ID {labor_id} not found")
-        res.raise_for_status()
-        return res.json()
+    headers = await get_auth_headers()
+    payload = body.model_dump()
+    res = await client.http_client.patch(
+        f"/labor/{labor_id}",
+        headers=headers,
+        json=payload
+    )
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Labor ID {labor_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
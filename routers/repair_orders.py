@@ -1,11 +1,38 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 from pydantic import BaseModel, Field
+from cachetools import TTLCache
 import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL, SHOP_ID
+import logging
+import msgpack
+import orjson
+from tekmetric import client
+from tekmetric.client import get_auth_headers, passthrough, cached_get, etag_response, make_etag, SHOP_ID
 import asyncio
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
+
+# Open RO list cache: (shop, status ids) -> (JSON body, ETag, MessagePack body)
+OPEN_RO_STATUS_IDS = (1, 2)
+OPEN_RO_CACHE_TTL = 5
+_open_ro_cache = TTLCache(maxsize=64, ttl=OPEN_RO_CACHE_TTL)
+# Lists at least this long are streamed instead of buffered. Still one JSON
+# array (not NDJSON) in RO order: the GPT action schema expects an array.
+OPEN_RO_STREAM_MIN = 10
+# Builds in progress, so concurrent misses share one fetch: key -> _OpenRoBuild
+_open_ro_inflight = {}
+# Bumped by writes, so a build that started before one isn't cached
+_open_ro_generation = 0
+
+_RO_URL = "/repair-orders"
+# Query pairs, so httpx can encode them without expanding a list value
+_OPEN_RO_PARAMS = (
+    ("shop", SHOP_ID),
+    *(("repairOrderStatusId", status_id) for status_id in OPEN_RO_STATUS_IDS),
+    ("size", 100),
+)
 
 class RepairOrderCreate(BaseModel):
     customerId: int = Field(..., description="Existing Tekmetric Customer ID")
@@ -25,102 +52,213 @@ class RepairOrderUpdate(BaseModel):
     serviceWriterId: Optional[int] = Field(None, description="Assign service writer by employee ID")
     customerTimeOut: Optional[str] = Field(None, description="Promise time (ISO-8601)")
 
+_EMPTY = {}
+
+def _simplify_ro(ro: dict, v: dict, c: dict) -> dict:
+    v = v or _EMPTY
+    c = c or _EMPTY
+    status = ro.get("repairOrderStatus") or _EMPTY
+    year = v.get("year")
+    vehicle_str = " ".join(filter(None, (str(year) if year else None, v.get("make"), v.get("model"))))
+    customer_str = " ".join(filter(None, (c.get("firstName"), c.get("lastName"))))
+    return {
+        "id": ro.get("id"),
+        "roNumber": ro.get("repairOrderNumber"),
+        "vehicle": vehicle_str or "Unknown",
+        "customer": customer_str or "Unknown",
+        "status": status.get("name", "Unknown"),
+        "lastUpdated": ro.get("updatedDate")
+    }
+
+class _OpenRoBuild:
+    """
+    One fetch + hydration of the open RO list, shared by every request that
+    misses the cache while it runs. Encoded pieces are kept as they're
+    produced, so each caller can stream the whole array at its own pace.
+    """
+
+    def __init__(self, key: tuple):
+        self.size = None  # RO count, once the list is fetched
+        self.fetched = asyncio.Event()
+        self.chunks = []
+        self._progress = asyncio.Event()
+        self.task = asyncio.create_task(self._run(key, _open_ro_generation))
+
+    def _push(self, chunk: bytes):
+        self.chunks.append(chunk)
+        self._progress.set()
+        self._progress = asyncio.Event()
+
+    async def _run(self, key: tuple, generation: int) -> tuple:
+        try:
+            ros = await _fetch_open_ros()
+            self.size = len(ros)
+            self.fetched.set()
+            items = []
+            async for ro in _hydrate_ros(ros):
+                items.append(ro)
+                self._push((b"," if self.chunks else b"[") + orjson.dumps(ro))
+            self._push(b"]" if self.chunks else b"[]")
+            body = b"".join(self.chunks)
+            # Both encodings up front, so neither endpoint re-decodes on a hit
+            cached = (body, make_etag(body), msgpack.packb(items))
+            if generation == _open_ro_generation:
+                # Skipped if a write landed mid-build; the list may predate it
+                _open_ro_cache[key] = cached
+            return cached
+        finally:
+            # Wake waiters on failure too; they re-raise from the task
+            self.fetched.set()
+            self._progress.set()
+
+    async def stream(self):
+        """Yield the JSON array from the start, waiting on the build as needed."""
+        sent = 0
+        while True:
+            progress = self._progress
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.task.done():
+                # Raises if the build failed part-way
+                self.task.result()
+                if sent == len(self.chunks):
+                    return
+            else:
+                await progress.wait()
+
+def _open_ro_build(key: tuple) -> _OpenRoBuild:
+    build = _open_ro_inflight.get(key)
+    if build is None:
+        build = _open_ro_inflight[key] = _OpenRoBuild(key)
+        # Only drop our own entry; _invalidate_open_ros may have replaced it
+        build.task.add_done_callback(lambda _: _open_ro_inflight.get(key) is build and _open_ro_inflight.pop(key))
+    return build
+
+def _invalidate_open_ros():
+    """After a write: drop the cached list and detach builds that predate it."""
+    global _open_ro_generation
+    _open_ro_generation += 1
+    _open_ro_cache.clear()
+    _open_ro_inflight.clear()
+
+async def _get_open_ros_body(key: tuple) -> tuple:
+    """Cached (body, etag, msgpack body) for the open RO list, building it on a miss."""
+    cached = _open_ro_cache.get(key)
+    if cached is not None:
+        return cached
+    # Shield so one cancelled caller doesn't cancel the build for the others
+    return await asyncio.shield(_open_ro_build(key).task)
+
 @router.get("/open", summary="List Open Repair Orders")
-async def list_open_repair_orders():
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
-    params = {
-        "shop": SHOP_ID,
-        "repairOrderStatusId": [1, 2],
-        "size": 100
+async def list_open_repair_orders(request: Request):
+    """
+    Open ROs with vehicle/customer labels. Large lists are streamed as a
+    JSON array, each RO sent as soon as its lookups finish.
+    """
+    # Dashboards poll this endpoint; serve the encoded body for a few seconds
+    # and let unchanged polls revalidate with If-None-Match
+    key = (SHOP_ID, OPEN_RO_STATUS_IDS)
+    cached = _open_ro_cache.get(key)
+    if cached is None:
+        build = _open_ro_build(key)
+        await build.fetched.wait()
+        if not build.task.done() and (build.size or 0) >= OPEN_RO_STREAM_MIN:
+            # Sent without an ETag; polls after the build finishes get one
+            return StreamingResponse(build.stream(), media_type="application/json")
+        # Streaming overhead isn't worth it for short lists
+        cached = await asyncio.shield(build.task)
+    body, etag, _ = cached
+    return etag_response(request, body, etag)
+
+@router.get("/open.msgpack", summary="List Open Repair Orders (MessagePack)")
+async def list_open_repair_orders_msgpack():
+    """
+    Same list as /open, MessagePack-encoded for bandwidth-sensitive clients.
+    Shares the /open body cache.
+    """
+    key = (SHOP_ID, OPEN_RO_STATUS_IDS)
+    _, _, packed = await _get_open_ros_body(key)
+    return Response(content=packed, media_type="application/msgpack")
+
+async def _fetch_open_ros() -> list:
+    headers = await get_auth_headers()
+    res = await client.http_client.get(_RO_URL, headers=headers, params=_OPEN_RO_PARAMS)
+    res.raise_for_status()
+    return orjson.loads(res.content).get("content", [])
+
+async def _fetch_label(kind: str, entity_id: int) -> dict:
+    try:
+        return await cached_get(kind, entity_id)
+    except httpx.HTTPError as e:
+        # A missing label shouldn't fail the whole list
+        logger.debug("RO hydration: %s/%s lookup failed: %s", kind, entity_id, e)
+        return _EMPTY
+
+async def _hydrate_ros(ros: list):
+    """
+    Yield simplified ROs in list order. Each distinct vehicle/customer the
+    RO list didn't embed is looked up once (via the entity cache), all
+    started up front; the cache caps how many hit Tekmetric at once.
+    """
+    vehicle_tasks = {
+        vid: asyncio.create_task(_fetch_label("vehicles", vid))
+        for vid in {ro["vehicleId"] for ro in ros if ro.get("vehicleId") and not ro.get("vehicle")}
+    }
+    customer_tasks = {
+        cid: asyncio.create_task(_fetch_label("customers", cid))
+        for cid in {ro["customerId"] for ro in ros if ro.get("customerId") and not ro.get("customer")}
     }
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/repair-orders", headers=headers, params=params)
-        res.raise_for_status()
-        ros = res.json().get("content", [])
-
-        async def hydrate(ro: dict):
-            vehicle_str = "Unknown"
-            if ro.get("vehicleId"):
-                try:
-                    v_res = await client.get(
-                        f"{TEKMETRIC_BASE_URL}/vehicles/{ro['vehicleId']}", headers=headers
-                    )
-                    v_res.raise_for_status()
-                    v = v_res.json()
-                    vehicle_str = f"{v.get('year','')} {v.get('make','')} {v.get('model','')}".strip()
-                except:
-                    pass
-            customer_str = "Unknown"
-            if ro.get("customerId"):
-                try:
-                    c_res = await client.get(
-                        f"{TEKMETRIC_BASE_URL}/customers/{ro['customerId']}", headers=headers
-                    )
-                    c_res.raise_for_status()
-                    c = c_res.json()
-                    customer_str = f"{c.get('firstName','')} {c.get('lastName','')}".strip()
-                except:
-                    pass
-            return {
-                "id": ro.get("id"),
-                "roNumber": ro.get("repairOrderNumber"),
-                "vehicle": vehicle_str or "Unknown",
-                "customer": customer_str or "Unknown",
-                "status": ro.get("repairOrderStatus", {}).get("name", "Unknown"),
-                "lastUpdated": ro.get("updatedDate")
-            }
-
-        return await asyncio.gather(*(hydrate(ro) for ro in ros))
+    try:
+        for ro in ros:
+            v = ro.get("vehicle")
+            if not v and ro.get("vehicleId") in vehicle_tasks:
+                v = await vehicle_tasks[ro["vehicleId"]]
+            c = ro.get("customer")
+            if not c and ro.get("customerId") in customer_tasks:
+                c = await customer_tasks[ro["customerId"]]
+            yield _simplify_ro(ro, v, c)
+    finally:
+        # Build failed part-way: drop the remaining lookups
+        for task in (*vehicle_tasks.values(), *customer_tasks.values()):
+            task.cancel()
 
 @router.get("/{ro_id}", summary="Get Repair Order by ID")
 async def get_repair_order(ro_id: int):
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/repair-orders/{ro_id}", headers=headers)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"RO ID {ro_id} not found")
-        res.raise_for_status()
-        return res.json()
+    headers = await get_auth_headers()
+    res = await client.http_client.get(f"{_RO_URL}/{ro_id}", headers=headers)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"RO ID {ro_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
 
 @router.post("/", summary="Create Repair Order")
 async def create_repair_order(payload: RepairOrderCreate):
-    token = await get_access_token()
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    data = payload.dict()
+    headers = await get_auth_headers()
+    data = payload.model_dump(exclude_none=True)
     data["shopId"] = SHOP_ID
-    async with httpx.AsyncClient() as client:
-        res = await client.post(f"{TEKMETRIC_BASE_URL}/repair-orders", headers=headers, json=data)
-        res.raise_for_status()
-        return res.json()
+    res = await client.http_client.post(_RO_URL, headers=headers, json=data)
+    res.raise_for_status()
+    _invalidate_open_ros()
+    return passthrough(res)
 
 @router.patch("/{ro_id}", summary="Update Repair Order")
 async def update_repair_order(ro_id: int, payload: RepairOrderUpdate):
-    token = await get_access_token()
-    headers = {
-        "Authorization": f"Bearer {token}",
-        "Content-Type": "application/json"
-    }
-    data = payload.dict(exclude_unset=True)
-    async with httpx.AsyncClient() as client:
-        check = await client.get(f"{TEKMETRIC_BASE_URL}/repair-orders/{ro_id}", headers=headers)
-        if check.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"RO ID {ro_id} not found")
-        res = await client.patch(f"{TEKMETRIC_BASE_URL}/repair-orders/{ro_id}", headers=headers, json=data)
-        res.raise_for_status()
-        return res.json()
+    headers = await get_auth_headers()
+    data = payload.model_dump(exclude_unset=True)
+    res = await client.http_client.patch(f"{_RO_URL}/{ro_id}", headers=headers, json=data)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"RO ID {ro_id} not found")
+    res.raise_for_status()
+    _invalidate_open_ros()
+    return passthrough(res)
 
 @router.delete("/{ro_id}", summary="Delete Repair Order")
 async def delete_repair_order(ro_id: int):
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        res = await client.delete(f"{TEKMETRIC_BASE_URL}/repair-orders/{ro_id}", headers=headers)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"RO ID {ro_id} not found")
-        res.raise_for_status()
-        return {"detail": f"Repair Order {ro_id} deleted"}
\ No newline at end of file
+    headers = await get_auth_headers()
+    res = await client.http_client.delete(f"{_RO_URL}/{ro_id}", headers=headers)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"RO ID {ro_id} not found")
+    res.raise_for_status()
+    _invalidate_open_ros()
+    return {"detail": f"Repair Order {ro_id} deleted"}
\ No newline at end of file
@@ -1,18 +1,44 @@
-from fastapi import APIRouter
-import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from cachetools import TTLCache
+from tekmetric import client
+from tekmetric.client import get_auth_headers, etag_response, make_etag, CLIENT_ID
 
 router = APIRouter()
 
+# Shop list per API credential: client id -> (body, etag)
+SHOPS_CACHE_TTL = 60
+_shops_cache = TTLCache(maxsize=8, ttl=SHOPS_CACHE_TTL)
+
 @router.get("/", summary="List Shops (Read-Only)")
-async def list_shops():
+async def list_shops(request: Request):
     """
     Returns the list of shops accessible by this API token.
     Tekmetric endpoint: GET /api/v1/shops
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/shops", headers=headers)
+    cached = _shops_cache.get(CLIENT_ID)
+    if cached is not None:
+        return etag_response(request, *cached)
+    headers = await get_auth_headers()
+    req = client.http_client.build_request("GET", "/shops", headers=headers)
+    res = await client.http_client.send(req, stream=True)
+    if res.is_error:
+        await res.aclose()
         res.raise_for_status()
-        return res.json()
\ No newline at end of file
+    # Pipe Tekmetric's JSON through chunk by chunk; no buffering or re-serialize
+    return StreamingResponse(
+        _stream_shops(res),
+        media_type="application/json",
+        status_code=res.status_code,
+        background=BackgroundTask(res.aclose),
+    )
+
+async def _stream_shops(res):
+    chunks = []
+    async for chunk in res.aiter_bytes():
+        chunks.append(chunk)
+        yield chunk
+    # Only a fully sent body is cached; later polls get an ETag
+    body = b"".join(chunks)
+    _shops_cache[CLIENT_ID] = (body, make_etag(body))
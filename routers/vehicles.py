@@ -1,8 +1,9 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import List, Optional
 from pydantic import BaseModel, Field
-import httpx
-from main import get_access_token, TEKMETRIC_BASE_URL, SHOP_ID
+import orjson
+from tekmetric import client
+from tekmetric.client import get_auth_headers, json_response, passthrough, invalidate_cached, SHOP_ID
 
 router = APIRouter()
 
@@ -39,31 +40,30 @@ class VehicleUpdate(BaseModel):
     notes: Optional[str] = Field(None, description="Any notes")
     unitNumber: Optional[str] = Field(None, description="Unit number")
 
+def _simplify_vehicle(v: dict) -> dict:
+    g = v.get
+    return {
+        "vehicleId": g("id"),
+        "year": g("year"),
+        "make": g("make"),
+        "model": g("model"),
+        "vin": g("vin", "N/A"),
+        "licensePlate": g("licensePlate", "N/A")
+    }
+
 @router.get("/", summary="List Vehicles by Customer")
 async def list_vehicles_by_customer(customerId: int = Query(..., description="Filter by customer ID")):
     """
     Returns all vehicles for a given customer.
     Tekmetric endpoint: GET /api/v1/vehicles?shop={shop}&customerId={id}&size=100
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
+    headers = await get_auth_headers()
     params = {"shop": SHOP_ID, "customerId": customerId, "size": 100}
 
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/vehicles", headers=headers, params=params)
-        res.raise_for_status()
-        vehicles = res.json().get("content", [])
-        simplified = []
-        for v in vehicles:
-            simplified.append({
-                "vehicleId": v.get("id"),
-                "year": v.get("year"),
-                "make": v.get("make"),
-                "model": v.get("model"),
-                "vin": v.get("vin", "N/A"),
-                "licensePlate": v.get("licensePlate", "N/A")
-            })
-        return {"vehicles": simplified}
+    res = await client.http_client.get("/vehicles", headers=headers, params=params)
+    res.raise_for_status()
+    vehicles = orjson.loads(res.content).get("content", [])
+    return json_response({"vehicles": [_simplify_vehicle(v) for v in vehicles]})
 
 @router.get("/{vehicle_id}", summary="Get Vehicle by ID")
 async def get_vehicle(vehicle_id: int):
@@ -71,14 +71,12 @@ async def get_vehicle(vehicle_id: int):
     Returns a single Vehicle by ID.
     Tekmetric endpoint: GET /api/v1/vehicles/{id}
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        res = await client.get(f"{TEKMETRIC_BASE_URL}/vehicles/{vehicle_id}", headers=headers)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Vehicle ID {vehicle_id} not found")
-        res.raise_for_status()
-        return res.json()
+    headers = await get_auth_headers()
+    res = await client.http_client.get(f"/vehicles/{vehicle_id}", headers=headers)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Vehicle ID {vehicle_id} not found")
+    res.raise_for_status()
+    return passthrough(res)
 
 @router.post("/", summary="Create Vehicle")
 async def create_vehicle(vehicle: VehicleCreate):
@@ -86,15 +84,13 @@ async def create_vehicle(vehicle: VehicleCreate):
     Creates a new Vehicle under a specified customer.
     Tekmetric endpoint: POST /api/v1/vehicles
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    payload = vehicle.dict()
+    headers = await get_auth_headers()
+    payload = vehicle.model_dump(exclude_none=True)
     payload["shopId"] = SHOP_ID
 
-    async with httpx.AsyncClient() as client:
-        res = await client.post(f"{TEKMETRIC_BASE_URL}/vehicles", headers=headers, json=payload)
-        res.raise_for_status()
-        return res.json()
+    res = await client.http_client.post("/vehicles", headers=headers, json=payload)
+    res.raise_for_status()
+    return passthrough(res)
 
 @router.patch("/{vehicle_id}", summary="Update Vehicle")
 async def update_vehicle(vehicle_id: int, vehicle: VehicleUpdate):
@@ -102,19 +98,16 @@ async def update_vehicle(vehicle_id: int, vehicle: VehicleUpdate):
     Updates fields on an existing Vehicle.
     Tekmetric endpoint: PATCH /api/v1/vehicles/{id}
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-    payload = vehicle.dict(exclude_unset=True)
+    headers = await get_auth_headers()
+    payload = vehicle.model_dump(exclude_unset=True)
+    payload["shopId"] = SHOP_ID
 
-    async with httpx.AsyncClient() as client:
-        # Check if vehicle exists
-        check = await client.get(f"{TEKMETRIC_BASE_URL}/vehicles/{vehicle_id}", headers=headers)
-        if check.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Vehicle ID {vehicle_id} not found")
-        payload["shopId"] = SHOP_ID
-        res = await client.patch(f"{TEKMETRIC_BASE_URL}/vehicles/{vehicle_id}", headers=headers, json=payload)
-        res.raise_for_status()
-        return res.json()
+    res = await client.http_client.patch(f"/vehicles/{vehicle_id}", headers=headers, json=payload)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Vehicle ID {vehicle_id} not found")
+    res.raise_for_status()
+    invalidate_cached("vehicles", vehicle_id)
+    return passthrough(res)
 
 @router.delete("/{vehicle_id}", summary="Delete Vehicle")
 async def delete_vehicle(vehicle_id: int):
@@ -122,11 +115,10 @@ async def delete_vehicle(vehicle_id: int):
     Deletes (archives) a Vehicle.
     Tekmetric endpoint: DELETE /api/v1/vehicles/{id}
     """
-    token = await get_access_token()
-    headers = {"Authorization": f"Bearer {token}"}
-    async with httpx.AsyncClient() as client:
-        res = await client.delete(f"{TEKMETRIC_BASE_URL}/vehicles/{vehicle_id}", headers=headers)
-        if res.status_code == 404:
-            raise HTTPException(status_code=404, detail=f"Vehicle ID {vehicle_id} not found")
-        res.raise_for_status()
-        return {"detail": f"Vehicle {vehicle_id} deleted successfully"}
\ No newline at end of file
+    headers = await get_auth_headers()
+    res = await client.http_client.delete(f"/vehicles/{vehicle_id}", headers=headers)
+    if res.status_code == 404:
+        raise HTTPException(status_code=404, detail=f"Vehicle ID {vehicle_id} not found")
+    res.raise_for_status()
+    invalidate_cached("vehicles", vehicle_id)
+    return {"detail": f"Vehicle {vehicle_id} deleted successfully"}
\ No newline at end of file
@@ -0,0 +1,334 @@
+import os
+import time
+import logging
+import base64
+import random
+import asyncio
+import hashlib
+import contextlib
+from fastapi import HTTPException, Request, Response
+from dotenv import load_dotenv
+from cachetools import LRUCache, TTLCache
+import httpx
+import orjson
+
+# Load environment variables
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Tekmetric configuration
+TEKMETRIC_BASE_URL = "https://shop.tekmetric.com/api/v1"
+CLIENT_ID = os.getenv("CLIENT_ID")
+CLIENT_SECRET = os.getenv("CLIENT_SECRET")
+SHOP_ID = os.getenv("TEKMETRIC_SHOP_ID")
+
+if not CLIENT_ID or not CLIENT_SECRET:
+    raise RuntimeError("CLIENT_ID or CLIENT_SECRET not set")
+
+# OAuth client-credentials request, built once from the environment
+_BASIC_AUTH = "Basic " + base64.b64encode(f"{CLIENT_ID}:{CLIENT_SECRET}".encode()).decode()
+_TOKEN_HEADERS = {
+    "Authorization": _BASIC_AUTH,
+    "Content-Type": "application/x-www-form-urlencoded;charset=UTF-8",
+}
+_TOKEN_DATA = {"grant_type": "client_credentials"}
+
+# Transient upstream failures: 429 is retried for any method (the request
+# was not processed), 502/503/504 only for idempotent methods
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.5
+RETRY_MAX_WAIT = 10.0
+_RETRY_ANY_METHOD = {429}
+_RETRY_IDEMPOTENT = {502, 503, 504}
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+def _should_retry(request: httpx.Request, response: httpx.Response) -> bool:
+    if response.status_code in _RETRY_ANY_METHOD:
+        return True
+    return response.status_code in _RETRY_IDEMPOTENT and request.method in _IDEMPOTENT_METHODS
+
+def _retry_delay(response: httpx.Response, attempt: int, max_wait: float) -> float:
+    # Exponential backoff with jitter, or Retry-After (seconds) if longer
+    delay = RETRY_BACKOFF * 2 ** attempt + random.random() * RETRY_BACKOFF
+    try:
+        delay = max(delay, float(response.headers.get("Retry-After", 0)))
+    except ValueError:
+        pass
+    return min(delay, max_wait)
+
+class RetryTransport(httpx.AsyncBaseTransport):
+    """Retries rate-limited and gateway-error responses from Tekmetric."""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        # Per-request budget, e.g. extensions={"retry_attempts": 1, "retry_max_wait": 1.0}
+        attempts = request.extensions.get("retry_attempts", RETRY_ATTEMPTS)
+        max_wait = request.extensions.get("retry_max_wait", RETRY_MAX_WAIT)
+        attempt = 0
+        while True:
+            response = await self._transport.handle_async_request(request)
+            if attempt >= attempts or not _should_retry(request, response):
+                return response
+            delay = _retry_delay(response, attempt, max_wait)
+            await response.aclose()
+            logger.debug("Tekmetric %s %s returned %s; retrying in %.2fs",
+                         request.method, request.url.path, response.status_code, delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+async def _drop_rejected_token(response: httpx.Response):
+    """Response hook: forget the cached token once Tekmetric answers 401 to it."""
+    if response.status_code != 401:
+        return
+    key = (CLIENT_ID, CLIENT_SECRET)
+    entry = _token_cache.get(key)
+    if entry and response.request.headers.get("Authorization") == entry["headers"]["Authorization"]:
+        logger.info("Tekmetric rejected the cached token; fetching a new one on the next call")
+        _token_cache.pop(key, None)
+
+# Shared HTTP client: one pooled (HTTP/2) connection set reused by every
+# handler. Created by open_client() in the app lifespan, so it (and the
+# asyncio primitives below) belong to the loop that serves requests.
+http_client: httpx.AsyncClient = None
+
+def _build_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        base_url=TEKMETRIC_BASE_URL,
+        transport=RetryTransport(httpx.AsyncHTTPTransport(
+            http2=True,
+            # Keep idle connections well past httpx's 5s default so polls reuse them
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=300),
+            # Connection-level retries (refused/reset before a response)
+            retries=2,
+        )),
+        timeout=httpx.Timeout(10.0),
+        event_hooks={"response": [_drop_rejected_token]},
+    )
+
+# Token cache, keyed by client credentials. Entries store an absolute UNIX
+# expires_at so they stay valid if the cache is ever persisted across workers.
+TOKEN_EXPIRY_SKEW = 60
+# Refresh in the background once this fraction of the lifetime has elapsed
+# (jittered so workers don't all refresh at the same moment)
+TOKEN_REFRESH_FRACTION = 0.5
+TOKEN_REFRESH_JITTER = 0.05
+# Wait before retrying after a failed scheduled refresh
+TOKEN_RETRY_DELAY = 30
+_token_cache = {}
+_token_lock: asyncio.Lock = None
+_token_refresh_task = None
+
+def _cached_entry():
+    entry = _token_cache.get((CLIENT_ID, CLIENT_SECRET))
+    if entry is None:
+        return None
+    if entry["expires_at"] is None:
+        # No lifetime given: valid until Tekmetric rejects it with a 401
+        return entry
+    # Short-lived tokens would never clear the full skew; keep at least half
+    skew = min(TOKEN_EXPIRY_SKEW, entry["expires_in"] / 2)
+    if time.time() < entry["expires_at"] - skew:
+        return entry
+    return None
+
+def _needs_refresh(entry: dict) -> bool:
+    if entry["expires_at"] is None:
+        return False
+    age = time.time() - entry["issued_at"]
+    jitter = random.uniform(-TOKEN_REFRESH_JITTER, TOKEN_REFRESH_JITTER)
+    return age / entry["expires_in"] > TOKEN_REFRESH_FRACTION + jitter
+
+async def _fetch_token() -> dict:
+    # Caller must hold _token_lock
+    res = await http_client.post("/oauth/token", headers=_TOKEN_HEADERS, data=_TOKEN_DATA)
+    # Never log the body: it carries the access token
+    logger.debug("Token response status: %s (%s)", res.status_code, res.http_version)
+    res.raise_for_status()
+    token_data = orjson.loads(res.content)
+    access_token = token_data.get("access_token")
+    expires_in = token_data.get("expires_in") or 0
+    if not access_token:
+        raise HTTPException(status_code=500, detail="No access_token returned")
+    now = time.time()
+    entry = {
+        "access_token": access_token,
+        "issued_at": now,
+        "expires_in": expires_in,
+        # None when no lifetime was given: kept until a 401 (_drop_rejected_token)
+        "expires_at": now + expires_in if expires_in > 0 else None,
+        # Shared by every request until the next refresh; never mutate
+        "headers": {"Authorization": f"Bearer {access_token}"},
+    }
+    _token_cache[(CLIENT_ID, CLIENT_SECRET)] = entry
+    return entry
+
+async def _refresh_token(stale: dict):
+    async with _token_lock:
+        # Skip if another caller already replaced the entry
+        if _token_cache.get((CLIENT_ID, CLIENT_SECRET)) is not stale:
+            return
+        try:
+            await _fetch_token()
+        except Exception as e:
+            # The current token is still valid; the next request will retry
+            logger.warning("Background token refresh failed: %s", e)
+
+def _schedule_refresh(entry: dict):
+    global _token_refresh_task
+    if _token_refresh_task and not _token_refresh_task.done():
+        return
+    _token_refresh_task = asyncio.create_task(_refresh_token(entry))
+
+async def token_refresher():
+    """
+    Renew the token ahead of expiry on a timer, so requests don't depend
+    on traffic arriving in time to trigger a refresh. Started from the app
+    lifespan; cancel it on shutdown.
+    """
+    key = (CLIENT_ID, CLIENT_SECRET)
+    while True:
+        entry = _token_cache.get(key)
+        if entry is not None:
+            if entry["expires_at"] is None:
+                # No lifetime: nothing to renew ahead of; check back in case
+                # a 401 dropped it
+                await asyncio.sleep(TOKEN_RETRY_DELAY)
+                continue
+            fraction = TOKEN_REFRESH_FRACTION + random.uniform(-TOKEN_REFRESH_JITTER, TOKEN_REFRESH_JITTER)
+            await asyncio.sleep(max(entry["issued_at"] + entry["expires_in"] * fraction - time.time(), 0))
+        await _refresh_token(entry)
+        if _token_cache.get(key) is entry:
+            # Refresh failed (already logged); the current token may still be valid
+            await asyncio.sleep(TOKEN_RETRY_DELAY)
+
+async def _valid_entry() -> dict:
+    entry = _cached_entry()
+    if entry:
+        if _needs_refresh(entry):
+            _schedule_refresh(entry)
+        return entry
+    async with _token_lock:
+        # Another request may have refreshed the token while we waited
+        return _cached_entry() or await _fetch_token()
+
+async def get_access_token() -> str:
+    return (await _valid_entry())["access_token"]
+
+async def get_auth_headers() -> dict:
+    """Bearer headers for Tekmetric calls. Shared dict: do not mutate."""
+    return (await _valid_entry())["headers"]
+
+# Slow-changing records (vehicle year/make/model, customer names) shared
+# across requests: {(kind, id): record}
+ENTITY_CACHE_TTL = 600
+_entity_cache = TTLCache(maxsize=4096, ttl=ENTITY_CACHE_TTL)
+_entity_inflight = {}
+# Last ETag seen per record, kept past the TTL so expired entries are
+# revalidated with If-None-Match: {(kind, id): (etag, record)}
+_entity_validators = LRUCache(maxsize=4096)
+# Bumped by invalidate_cached, so a fetch that started before a write
+# can't store the pre-write record: {(kind, id): generation}
+_entity_generations = {}
+
+# Cap on concurrent entity lookups, shared by all requests so overlapping
+# RO hydrations can't stack up past Tekmetric's rate limits
+TEKMETRIC_CONCURRENCY = int(os.getenv("TEKMETRIC_CONCURRENCY", 20))
+_entity_sem: asyncio.Semaphore = None
+# Tighter than the client default: these records only supply labels, and
+# one stuck lookup shouldn't hold up a whole RO list. Retries get a matching
+# budget (one retry, at most 1s apart) so they fit while holding _entity_sem.
+ENTITY_TIMEOUT = httpx.Timeout(4.0, connect=2.0)
+_ENTITY_RETRY = {"retry_attempts": 1, "retry_max_wait": 1.0}
+
+async def _fetch_entity(kind: str, entity_id: int) -> dict:
+    key = (kind, entity_id)
+    generation = _entity_generations.get(key, 0)
+    headers = await get_auth_headers()
+    validator = _entity_validators.get(key)
+    if validator is not None:
+        headers = {**headers, "If-None-Match": validator[0]}
+    async with _entity_sem:
+        res = await http_client.get(f"/{kind}/{entity_id}", headers=headers, timeout=ENTITY_TIMEOUT,
+                                    extensions=_ENTITY_RETRY)
+    if res.status_code == 304 and validator is not None:
+        record = validator[1]
+    else:
+        res.raise_for_status()
+        record = orjson.loads(res.content)
+    if _entity_generations.get(key, 0) != generation:
+        # Invalidated mid-fetch: the record may predate the write
+        return record
+    etag = res.headers.get("ETag")
+    if etag and res.status_code != 304:
+        _entity_validators[key] = (etag, record)
+    _entity_cache[key] = record
+    return record
+
+async def cached_get(kind: str, entity_id: int) -> dict:
+    """
+    GET /{kind}/{entity_id} (e.g. "vehicles", 42) through the entity cache.
+    Concurrent misses for the same record share one request. Raises
+    httpx.HTTPStatusError on a non-2xx response; failures are not cached.
+    """
+    key = (kind, entity_id)
+    record = _entity_cache.get(key)
+    if record is not None:
+        return record
+    task = _entity_inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_fetch_entity(kind, entity_id))
+        _entity_inflight[key] = task
+        # Only drop our own entry; invalidate_cached may have replaced it
+        task.add_done_callback(lambda t: _entity_inflight.get(key) is t and _entity_inflight.pop(key))
+    # Shield so one cancelled caller doesn't cancel the fetch for the others
+    return await asyncio.shield(task)
+
+def invalidate_cached(kind: str, entity_id: int):
+    key = (kind, entity_id)
+    _entity_generations[key] = _entity_generations.get(key, 0) + 1
+    _entity_cache.pop(key, None)
+    _entity_validators.pop(key, None)
+    # Later callers start a fresh fetch instead of joining the stale one
+    _entity_inflight.pop(key, None)
+
+async def open_client():
+    """Create the shared client and lock/semaphore. Call on app startup."""
+    global http_client, _token_lock, _token_refresh_task, _entity_sem
+    http_client = _build_client()
+    _token_lock = asyncio.Lock()
+    _token_refresh_task = None
+    _entity_sem = asyncio.Semaphore(TEKMETRIC_CONCURRENCY)
+    # Tasks from a previous loop can't be awaited from this one
+    _entity_inflight.clear()
+
+async def close_client():
+    """Close the shared client. Call on app shutdown."""
+    # A background refresh could otherwise be mid-request on a closed client
+    if _token_refresh_task is not None:
+        _token_refresh_task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await _token_refresh_task
+    await http_client.aclose()
+
+def passthrough(res: httpx.Response) -> Response:
+    """Forward Tekmetric's JSON body as-is, without a decode/encode round trip."""
+    return Response(content=res.content, status_code=res.status_code, media_type="application/json")
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.md5(body).hexdigest()}"'
+
+def etag_response(request: Request, body: bytes, etag: str) -> Response:
+    """JSON body with its ETag, or an empty 304 when If-None-Match matches."""
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers={"ETag": etag})
+    return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+def json_response(content) -> Response:
+    """Encode with orjson directly, skipping FastAPI's jsonable_encoder pass."""
+    return Response(content=orjson.dumps(content), media_type="application/json")